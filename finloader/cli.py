@@ -1,9 +1,10 @@
 import os
 import sys
+import atexit
 import argparse
 import logging
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import MemoryHandler, RotatingFileHandler
 
 from dotenv import load_dotenv
 from rich.logging import RichHandler
@@ -15,6 +16,11 @@ from finloader.downloader import Downloader
 logger = logging.getLogger("finloader.cli")
 
 
+def _flush_logs():
+    for h in logging.getLogger().handlers:
+        h.flush()
+
+
 def setup_logging(log_path: str = "logs/finloader.log", level=logging.INFO):
     Path(log_path).parent.mkdir(parents=True, exist_ok=True)
 
@@ -24,6 +30,10 @@ def setup_logging(log_path: str = "logs/finloader.log", level=logging.INFO):
     if root.handlers:
         for h in list(root.handlers):
             root.removeHandler(h)
+            target = getattr(h, "target", None)  # MemoryHandler.close() drops it without closing it
+            h.close()  # flushes a buffered handler
+            if target is not None:
+                target.close()  # the rotating file it buffered for
 
     # Always allow DEBUG at root so handlers can filter independently
     root.setLevel(logging.DEBUG)
@@ -53,7 +63,14 @@ def setup_logging(log_path: str = "logs/finloader.log", level=logging.INFO):
     )
     fh.setLevel(logging.DEBUG)  # DEBUG for rotating file
     fh.setFormatter(file_fmt)
-    root.addHandler(fh)
+
+    # Batch file writes, flushed when full, on errors, and at exit
+    mh = MemoryHandler(capacity=200, flushLevel=logging.ERROR, target=fh)
+    mh.setLevel(logging.DEBUG)
+    root.addHandler(mh)
+    # runs before logging's own shutdown, registered once however often this is called
+    atexit.unregister(_flush_logs)
+    atexit.register(_flush_logs)
 
     # Silence third-party libraries
     noisy_libs = [
@@ -76,12 +93,15 @@ def log_invocation():
 def parse_inputs():
     parser = argparse.ArgumentParser()
     parser.add_argument("provider")
-    parser.add_argument("base")
-    parser.add_argument("quote")
+    parser.add_argument("base", help="base currency, or 'major' for all major pairs")
+    parser.add_argument("quote", nargs="?")
     parser.add_argument("tf_length", type=int)
     parser.add_argument("tf_unit")
     parser.add_argument("-d", "--debug", action="store_true")
-    return parser.parse_args()
+    args = parser.parse_args()
+    if (args.base == "major") != (args.quote is None):
+        parser.error("pass either 'BASE QUOTE' or 'major'")
+    return args
 
 
 def main():
@@ -91,12 +111,16 @@ def main():
     load_dotenv()
 
     try:
-        provider = DataProvider.from_name(args.provider)
-        s = ForexSymbol(args.base, args.quote)
-        tf = Timeframe(args.tf_length, args.tf_unit)
-
-        downloader = Downloader(provider, os.getenv("DATA_DIR"))
-        downloader.download(s, tf)
+        tf = Timeframe.get(args.tf_length, args.tf_unit)
+
+        with DataProvider.from_name(args.provider, cache_dir=os.getenv("CACHE_DIR")) as provider:
+            downloader = Downloader(provider, os.getenv("DATA_DIR"))
+            if args.base == "major":
+                # independent, network-bound downloads, run on the provider's threads
+                pairs = [(ForexSymbol.get(base, quote), tf) for base, quote in ForexSymbol.MAJOR_PAIRS]
+                downloader.download_many(pairs)
+            else:
+                downloader.download(ForexSymbol.get(args.base, args.quote), tf)
     except KeyboardInterrupt:
         pass
     except ValueError as e:
@@ -1,3 +1,6 @@
+import functools
+import sys
+
 import pandas as pd
 
 
@@ -164,26 +167,47 @@ class ForexSymbol:
         'XAU': 'Gold',
         'XAG': 'Silver',
     }
+    _CURRENCY_CODES = frozenset(CURRENCIES)
+
+    # (base, quote) of the seven major pairs
+    MAJOR_PAIRS = (
+        ("EUR", "USD"),
+        ("GBP", "USD"),
+        ("USD", "JPY"),
+        ("USD", "CHF"),
+        ("AUD", "USD"),
+        ("USD", "CAD"),
+        ("NZD", "USD"),
+    )
 
-    __slots__ = ("base", "quote")
+    __slots__ = ("base", "quote", "_hash", "_str")
 
     def __init__(self, base: str, quote: str):
-        self.base = base.upper()
-        self.quote = quote.upper()
+        # interned, so lookups and hashing reuse the cached string hash
+        self.base = sys.intern(base.upper())
+        self.quote = sys.intern(quote.upper())
     
         self._validate()  # assert that base and quote are correct
+        self._hash = None
+        self._str = f"{self.base}{self.quote}"
+
+    @classmethod
+    @functools.lru_cache(maxsize=128)
+    def get(cls, base: str, quote: str) -> "ForexSymbol":
+        """Shared, already validated instance for (`base`, `quote`)"""
+        return cls(base, quote)
 
     def _validate(self):
-        if self.base not in ForexSymbol.CURRENCIES:
+        if self.base not in ForexSymbol._CURRENCY_CODES:
             raise ValueError(f"Invalid ForexSymbol's base currency: {self.base}")
-        if self.quote not in ForexSymbol.CURRENCIES:
+        if self.quote not in ForexSymbol._CURRENCY_CODES:
             raise ValueError(f"Invalid ForexSymbol's quote currency: {self.quote}")
 
     def __repr__(self):
         return f"ForexSymbol({self.base}, {self.quote})"
 
     def __str__(self):
-        return f"{self.base}{self.quote}"
+        return self._str
     
     def __eq__(self, other):
         return (
@@ -193,7 +217,9 @@ class ForexSymbol:
         )
 
     def __hash__(self):
-        return hash((self.base, self.quote))
+        if self._hash is None:
+            self._hash = hash((self.base, self.quote))
+        return self._hash
 
 
 class Timeframe:
@@ -216,25 +242,36 @@ class Timeframe:
         SECOND: "s",
         MINUTE: "min",
         HOUR: "h",
-        DAY: "d",
-        WEEK: "w",
+        DAY: "D",
+        WEEK: "W",
         MONTH: "M",
     }
 
+    # Supported lengths per unit, and the units below a day
+    _SUPPORTED_LENGTHS = {
+        MINUTE: frozenset({1, 5, 15, 30}),
+        HOUR: frozenset({1, 4}),
+        DAY: frozenset({1}),
+        WEEK: frozenset({1}),
+        MONTH: frozenset({1}),
+    }
+    _INTRADAY_UNITS = frozenset({SECOND, MINUTE, HOUR})
+
+    __slots__ = ("length", "unit", "_timedelta", "_is_intraday", "_str")
+
     def __init__(self, length: int, unit: str | None = None):
         self.length = length
         self.unit = unit
+        self._str = f"{self.length}{self.unit}"  # used by error messages too
 
         self._validate_length_and_unit()
 
+        # Computed once, both are read on every need_update()
+        self._timedelta = self._to_timedelta()
+        self._is_intraday = self.unit in Timeframe._INTRADAY_UNITS
+
     def _validate_length_and_unit(self):
-        if not (
-            (self.unit == Timeframe.MINUTE and self.length in (1, 5, 15, 30))
-            or (self.unit == Timeframe.HOUR and self.length in (1, 4))
-            or (self.unit == Timeframe.DAY and self.length in (1,))
-            or (self.unit == Timeframe.WEEK and self.length in (1,))
-            or (self.unit == Timeframe.MONTH and self.length in (1,))
-        ):
+        if self.length not in Timeframe._SUPPORTED_LENGTHS.get(self.unit, ()):
             raise ValueError(f"Timeframe not supported: '{self}'")
         
         if not isinstance(self.length, int):
@@ -242,6 +279,13 @@ class Timeframe:
     
     @property
     def timedelta(self) -> pd.Timedelta:
+        return self._timedelta
+
+    @property
+    def is_intraday(self) -> bool:
+        return self._is_intraday
+
+    def _to_timedelta(self) -> pd.Timedelta:
         if self.unit not in self._UNIT_TO_PANDAS:
             raise ValueError(f"Cannot convert unit to Timedelta: {self.unit}")
 
@@ -250,12 +294,24 @@ class Timeframe:
         else:
             return pd.Timedelta(self.length, unit=self._UNIT_TO_PANDAS[self.unit])
 
-    @property
-    def is_intraday(self) -> bool:
-        return self.unit in (Timeframe.SECOND, Timeframe.MINUTE, Timeframe.HOUR)
+    @classmethod
+    @functools.lru_cache(maxsize=128)
+    def get(cls, length: int, unit: str) -> "Timeframe":
+        """Shared, already validated instance for (`length`, `unit`)"""
+        return cls(length, unit)
 
     def __repr__(self):
         return f"Timeframe({self.length}, {self.unit})"
 
     def __str__(self):
-        return f"{self.length}{self.unit}"
+        return self._str
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Timeframe)
+            and self.length == other.length
+            and self.unit == other.unit
+        )
+
+    def __hash__(self):
+        return hash((self.length, self.unit))
@@ -1,19 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import logging
+import threading
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 from .core import ForexSymbol, Timeframe
 from .provider import DataProvider
-from .schema import validate_data, FILE_EXTENSION
+from .schema import to_table, FILE_EXTENSION, REQUIRED_INDEX_NAME
+from .utils import no_gc, collect_results, project_path
 
 logger = logging.getLogger(__name__)
 
+_DEFAULT_DATA_DIR = project_path(".data")  # same as .env.example
+
 
 class SymbolFile:
     DEFAULT_TIME_START = pd.Timestamp("2000-01-01", tz="UTC")  # in the case of empty file
 
-    def __init__(self, provider_dir: Path, s: ForexSymbol, tf: Timeframe):
+    def __init__(
+        self,
+        provider_dir: Path,
+        s: ForexSymbol,
+        tf: Timeframe,
+        latest_utc: pd.Timestamp | None = None,
+    ):
         self.provider_dir = provider_dir
         self.symbol = s
         self.tf = tf
@@ -22,28 +37,55 @@ class SymbolFile:
         self.dir = self.provider_dir / str(self.symbol)  # only created when really need to save
         self.path = self.dir / self.name
 
+        self._repr = f"SymbolFile({self.provider_dir.name}, {self.symbol}, {self.tf})"
+        self._latest_utc = latest_utc  # cached, updated on save
+
     def __str__(self):
         return self.name
 
     def __repr__(self):
-        return f"SymbolFile({self.provider_dir.name}, {self.symbol}, {self.tf})"
+        return self._repr
 
     def exists(self):
         return self.path.exists()
 
+    def mtime_ns(self) -> int | None:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
     def latest_utc(self):
+        if self._latest_utc is None:
+            self._latest_utc = self._read_latest_utc()
+        return self._latest_utc
+
+    def _read_latest_utc(self):
         if not self.path.exists():
             return SymbolFile.DEFAULT_TIME_START
 
-        df = pd.read_parquet(self.path)
-        if df.empty:
+        # Only the footer is read, row-group statistics hold the index's max
+        metadata = pq.read_metadata(self.path, memory_map=True)
+        if metadata.num_rows == 0:
             return SymbolFile.DEFAULT_TIME_START
 
-        # index is already persisted in parquet; assume it is sorted
+        col = metadata.schema.to_arrow_schema().get_field_index(REQUIRED_INDEX_NAME)
+        maxes = []
+        for i in range(metadata.num_row_groups):
+            stats = metadata.row_group(i).column(col).statistics
+            if stats is None or not stats.has_min_max:
+                return self._latest_utc_from_data()
+            maxes.append(stats.max)
+        return pd.Timestamp(max(maxes)).tz_convert("UTC")
+
+    def _latest_utc_from_data(self):
+        df = pd.read_parquet(self.path, engine="pyarrow", columns=[REQUIRED_INDEX_NAME], memory_map=True)
         return df.index.max()
 
-    def need_update(self):
-        now = pd.Timestamp.now(tz="UTC")
+    def need_update(self, now: pd.Timestamp | None = None):
+        """`now` defaults to the current UTC time"""
+        if now is None:
+            now = pd.Timestamp.now(tz="UTC")
         if self.tf.unit in (Timeframe.DAY, Timeframe.WEEK, Timeframe.MONTH):
             now = now.normalize()  # zero out the time part if unit >= day
 
@@ -58,18 +100,108 @@ class SymbolFile:
         return time_diff >= self.tf.timedelta
     
     def save(self, data: pd.DataFrame):
-        self.dir.mkdir(parents=True, exist_ok=True)
-        data.to_parquet(self.path)
+        self.dir.mkdir(parents=True, exist_ok=True)  # created on first write, staleness checks never touch it
+        table = to_table(data)
+        self._write(table.schema, [], table)
+        self._latest_utc = data.index[-1]
 
+    def update(self, data: pd.DataFrame) -> int:
+        """
+        Merge `data` into the existing file, return the number of bars added.
+        - Each calendar year is one row group, past years are copied as Arrow tables.
+        - Only the years `data` touches are read into pandas and merged.
+        - The file is written to a temporary path and atomically replaced.
+        """
+        pf = pq.ParquetFile(self.path, memory_map=True)  # served from the page cache when warm
+        year_start = data.index[0].normalize().replace(month=1, day=1)
+        n_head = self._count_row_groups_before(pf, year_start)
 
-class Downloader:
-    def __init__(self, provider: DataProvider, data_dir: str):
-        project_root = Path(__file__).resolve().parents[1]
+        with no_gc():
+            tail = pf.read_row_groups(range(n_head, pf.num_row_groups)).to_pandas()
+            # Merging two validated, sorted frames keeps them valid,
+            # only the order is re-checked, the cast rejects NaN and bad types
+            merged = _merge_sorted(tail, data)
+        if not merged.index.is_monotonic_increasing:
+            raise ValueError(f"'{self}' merged data is not sorted")
+        table = to_table(merged).cast(pf.schema_arrow)
+
+        head = (pf.read_row_group(i) for i in range(n_head))
+        self._write(pf.schema_arrow, head, table)
+        self._latest_utc = merged.index[-1]  # the merged tail ends the file
+        return len(merged) - len(tail)
+
+    def _write(self, schema: pa.Schema, head, tail: pa.Table):
+        """Write `head` row groups as they are, then `tail` split into one row group per year"""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with pq.ParquetWriter(
+                tmp_path,
+                schema,
+                compression="zstd",
+                compression_level=3,
+                # evenly spaced timestamps delta-encode to almost nothing
+                use_dictionary=[name for name in schema.names if name != REQUIRED_INDEX_NAME],
+                column_encoding={REQUIRED_INDEX_NAME: "DELTA_BINARY_PACKED"},
+                data_page_version="2.0",  # levels kept out of the compressed block
+            ) as writer:
+                for row_group in head:
+                    writer.write_table(row_group)
+                for row_group in _split_by_year(tail):
+                    writer.write_table(row_group)
+            tmp_path.replace(self.path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        self._latest_utc = None
 
+    @staticmethod
+    def _count_row_groups_before(pf: pq.ParquetFile, time: pd.Timestamp) -> int:
+        col = pf.schema_arrow.get_field_index(REQUIRED_INDEX_NAME)
+        for i in range(pf.num_row_groups):
+            stats = pf.metadata.row_group(i).column(col).statistics
+            if stats is None or not stats.has_min_max or pd.Timestamp(stats.max) >= time:
+                return i
+        return pf.num_row_groups
+
+
+def _split_by_year(table: pa.Table):
+    years = pc.year(table.column(REQUIRED_INDEX_NAME)).to_numpy()
+    bounds = [0, *(np.flatnonzero(np.diff(years)) + 1), len(years)]
+    for lo, hi in zip(bounds, bounds[1:]):
+        yield table.slice(lo, hi - lo)
+
+
+def _merge_sorted(existing: pd.DataFrame, data: pd.DataFrame) -> pd.DataFrame:
+    """Merge two sorted frames, `data` wins on overlapping timestamps"""
+    # Both are sorted, so only rows from data's first timestamp on can overlap
+    splice = existing.index.searchsorted(data.index[0])
+    overlap = existing.iloc[splice:]
+
+    # Overlapping timestamps take data's values (keep latest)
+    kept = overlap[~overlap.index.isin(data.index)]
+    if kept.empty:
+        # the usual append or full overlap, data already follows existing in order
+        return pd.concat([existing.iloc[:splice], data])
+
+    tail = pd.concat([kept, data]).sort_index()
+    return pd.concat([existing.iloc[:splice], tail])
+
+
+class Downloader:
+    def __init__(self, provider: DataProvider, data_dir: str | None = None):
         self.provider = provider
-        self.provider_dir = project_root / data_dir / self.provider.name
+        data_dir = project_path(data_dir) if data_dir else _DEFAULT_DATA_DIR
+        self.provider_dir = data_dir / self.provider.name
         self.provider_dir.mkdir(parents=True, exist_ok=True)
 
+        # (file mtime, latest saved timestamp) per (symbol, tf), spares re-reading footers in this process,
+        # the mtime catches files rewritten by another process
+        self._latest_utc_cache: dict[tuple[str, str], tuple[int | None, pd.Timestamp]] = {}
+
+        # One lock per (symbol, tf) file, so concurrent downloads never write the same file
+        self._file_locks: dict[tuple[str, str], threading.Lock] = {}
+        self._file_locks_guard = threading.Lock()
+
     def download(self, symbol: ForexSymbol, tf: Timeframe):
         """
         Orchestrate downloading process:
@@ -77,40 +209,95 @@ class Downloader:
         - Download everything if file does not exist.
         - Download only from latest data if file exists.
         """
-        symbol_file = SymbolFile(self.provider_dir, symbol, tf)
+        key = (str(symbol), str(tf))
+        with self._file_lock(key):
+            symbol_file = self._symbol_file(key, symbol, tf)
+            self._download(symbol_file)
+            self._latest_utc_cache[key] = (symbol_file.mtime_ns(), symbol_file.latest_utc())
+
+    def _download(self, symbol_file: SymbolFile):
         if not symbol_file.need_update():
             logger.info(f"'{symbol_file}' is up to date")
             return
-        
-        data = self.provider.get(symbol, tf, symbol_file.latest_utc())
-        if data is None:
-            logger.warning(f"'{symbol_file}' is not updated")
+
+        while True:
+            data = self.provider.get(symbol_file.symbol, symbol_file.tf, symbol_file.latest_utc())
+            if data is None:
+                logger.warning(f"'{symbol_file}' is not updated")
+                return
+            self._save(data, symbol_file)
+            if not data.attrs.get("truncated"):
+                return
+            # saved so far, a long backfill survives any later failure
+            logger.info(f"'{symbol_file}' partly downloaded, resuming from {symbol_file.latest_utc()}")
+
+    def download_many(self, pairs: list[tuple[ForexSymbol, Timeframe]], max_workers: int | None = None):
+        """
+        Download every (`symbol`, `tf`) pair concurrently.
+        The work is network-bound, so threads overlap the API calls.
+        `max_workers` defaults to the provider's `concurrency`.
+        A failed pair is logged and does not stop the others.
+        """
+        max_workers = max_workers or self.provider.concurrency
+        stale = self.stale_pairs(pairs, max_workers)  # footer reads only
+        if not stale:
             return
-        self._save(data, symbol_file)
 
-    def _save(self, data: pd.DataFrame, symbol_file: SymbolFile):
-        validate_data(data)
-        if symbol_file.exists():
-            logger.debug(f"Appending to '{symbol_file}'")
-            old_len, appended = self._append_data(data, symbol_file)
-        else:
-            logger.debug(f"Create new file '{symbol_file}'")
-            old_len, appended = 0, data
-        validate_data(appended)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(self.download, s, tf): f"'{s}' ({tf})" for s, tf in stale}
 
-        symbol_file.save(appended)
-        logger.info(f"Save '{symbol_file}' ({len(appended) - old_len} bars added)")
+        collect_results(futures, logger)
 
-    def _append_data(self, data: pd.DataFrame, symbol_file: SymbolFile):
-        # TODO: optimize later with stream-based method
+    def stale_pairs(self, pairs: list[tuple[ForexSymbol, Timeframe]], max_workers: int | None = None):
+        """
+        Check every pair's staleness from file footers, drop the up-to-date ones.
+        `max_workers` defaults to the provider's `concurrency`.
+        """
+        now = pd.Timestamp.now(tz="UTC")  # one clock for the whole batch
+        with ThreadPoolExecutor(max_workers=max_workers or self.provider.concurrency) as pool:
+            futures = [pool.submit(self._need_update, s, tf, now) for s, tf in pairs]
 
-        # Load the old file
-        existing = pd.read_parquet(symbol_file.path)
-        old_len = len(existing)
+        stale = []
+        for future, pair in zip(futures, pairs):
+            # a failed check is left for download() to report
+            if future.exception() is not None or future.result():
+                stale.append(pair)
+        return stale
 
-        # Concatenate and remove duplicate timestamps (keep latest)
-        new = pd.concat([existing, data])
-        new = new[~new.index.duplicated(keep="last")]
-        new = new.sort_index()
+    def _need_update(self, symbol: ForexSymbol, tf: Timeframe, now: pd.Timestamp | None = None) -> bool:
+        key = (str(symbol), str(tf))
+        with self._file_lock(key):
+            symbol_file = self._symbol_file(key, symbol, tf)
+            need_update = symbol_file.need_update(now)
+            self._latest_utc_cache[key] = (symbol_file.mtime_ns(), symbol_file.latest_utc())
 
-        return old_len, new
+        if not need_update:
+            logger.info(f"'{symbol_file}' is up to date")
+        return need_update
+
+    def _symbol_file(self, key: tuple[str, str], symbol: ForexSymbol, tf: Timeframe) -> SymbolFile:
+        """Build the `SymbolFile`, reusing the cached latest timestamp while the file is unchanged"""
+        cached = self._latest_utc_cache.get(key)
+        symbol_file = SymbolFile(self.provider_dir, symbol, tf, latest_utc=cached[1] if cached else None)
+        if cached is not None and cached[0] != symbol_file.mtime_ns():
+            symbol_file = SymbolFile(self.provider_dir, symbol, tf)  # rewritten since, read the footer again
+        return symbol_file
+
+    def _file_lock(self, key: tuple[str, str]) -> threading.Lock:
+        with self._file_locks_guard:
+            return self._file_locks.setdefault(key, threading.Lock())
+
+    def _save(self, data: pd.DataFrame, symbol_file: SymbolFile):
+        """`data` comes from `DataProvider.get`, which already validated it"""
+        if data.empty:
+            logger.info(f"'{symbol_file}' has no new data")
+            return
+
+        if symbol_file.exists():
+            logger.debug(f"Merging into '{symbol_file}'")
+            added = symbol_file.update(data)
+        else:
+            logger.debug(f"Create new file '{symbol_file}'")
+            symbol_file.save(data)
+            added = len(data)
+        logger.info(f"Save '{symbol_file}' ({added} bars added)")
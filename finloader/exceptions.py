@@ -1,5 +1,8 @@
 class TemporaryRateLimit(Exception):
-    pass
+    def __init__(self, *args, retry_after: float | None = None, made_progress: bool = False):
+        super().__init__(*args)
+        self.retry_after = retry_after  # seconds, when the server says so
+        self.made_progress = made_progress  # part of the call got through before the limit
 
 
 class DailyRateLimit(Exception):
@@ -1,11 +1,14 @@
-from io import StringIO
 import logging
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import requests
 
 from .base import DataProvider
 from ..core import ForexSymbol, Timeframe
+from ..schema import RESPONSE_ARROW_TYPES
+from ..utils import json_loads
 from ..exceptions import TemporaryRateLimit, DailyRateLimit
 
 logger = logging.getLogger(__name__)
@@ -13,46 +16,56 @@ logger = logging.getLogger(__name__)
 
 class AlphaVantage(DataProvider):
     DIFF_DAYS_TO_DOWNLOAD_FULL = 90
+    _FULL_TIMEDELTA = pd.Timedelta(days=DIFF_DAYS_TO_DOWNLOAD_FULL)
 
-    def __init__(self, api_key):
-        super().__init__("alpha_vantage", api_key)
+    _UNIT_TO_FUNCTION = {
+        Timeframe.DAY: 'FX_DAILY',
+        Timeframe.WEEK: 'FX_WEEKLY',
+        Timeframe.MONTH: 'FX_MONTHLY'
+    }
+
+    CSV_PARSE_OPTIONS = pacsv.ParseOptions(delimiter=",")
+    CSV_CONVERT_OPTIONS = pacsv.ConvertOptions(column_types={**RESPONSE_ARROW_TYPES, "timestamp": pa.timestamp("ns")})
+
+    def __init__(self, api_key, **kwargs):
+        super().__init__("alpha_vantage", api_key, concurrency=1, **kwargs)  # free API: 1 request per second
 
     def _get_api_function(self, tf: Timeframe) -> str:
-        functions = {
-            Timeframe.DAY: 'FX_DAILY',
-            Timeframe.WEEK: 'FX_WEEKLY',
-            Timeframe.MONTH: 'FX_MONTHLY'
-        }
-        if tf.unit not in functions:
-            raise ValueError(f"AlphaVantage: timeframe '{tf}' is not supported by free API")
-        return functions[tf.unit]
+        try:
+            return AlphaVantage._UNIT_TO_FUNCTION[tf.unit]
+        except KeyError:
+            raise ValueError(f"AlphaVantage: timeframe '{tf}' is not supported by free API") from None
 
-    def _get_api_outputsize(self, utc_start: pd.Timestamp) -> str:
-        time_diff = pd.Timestamp.now(tz="UTC") - utc_start
-        timedelta = pd.Timedelta(days=AlphaVantage.DIFF_DAYS_TO_DOWNLOAD_FULL)
-        return "full" if time_diff >= timedelta else "compact"
+    def _get_api_outputsize(self, utc_start: pd.Timestamp, utc_now: pd.Timestamp) -> str:
+        time_diff = utc_now - utc_start
+        return "full" if time_diff >= AlphaVantage._FULL_TIMEDELTA else "compact"
 
-    def _call_api(self, s: ForexSymbol, tf: Timeframe, time_start_utc: pd.Timestamp):
+    def _call_api(self, s: ForexSymbol, tf: Timeframe, time_start_utc: pd.Timestamp, utc_now: pd.Timestamp):
         params = {
             "from_symbol": s.base,
             "to_symbol": s.quote,
             "function": self._get_api_function(tf),
-            "outputsize": self._get_api_outputsize(time_start_utc),
+            "outputsize": self._get_api_outputsize(time_start_utc, utc_now),
             "datatype": "csv",  # API data sending format, DO NOT EDIT
             "apikey": self.api_key
         }
         logger.debug(f"using outputsize={params['outputsize']}")
         try:
-            res = requests.get("https://www.alphavantage.co/query", params, timeout=10)
+            res = self._http_get("https://www.alphavantage.co/query", params=params, timeout=10, stream=True)
         except requests.exceptions.ConnectionError as e:
             raise ConnectionError("Not connected to the internet")
 
+        if res.status_code == 429:
+            raise TemporaryRateLimit(
+                "AlphaVantage: temporary rate-limited",
+                retry_after=self._get_retry_after(res),
+            )
         if not res.ok:
             raise ValueError("AlphaVantage: data not downloaded")
 
         content_type = str(res.headers.get("Content-Type", ""))
         if "json" in content_type.lower():
-            data = res.json()
+            data = json_loads(res.content)
             if "Error Message" in data:
                 raise ValueError(f"AlphaVantage: {data['Error Message']}")
             elif "Information" in data:
@@ -66,10 +79,13 @@ class AlphaVantage(DataProvider):
         return res
     
     def _normalize(self, res) -> pd.DataFrame:
-        df = pd.read_csv(StringIO(res.text), index_col="timestamp")  # converting AlphaVantage CSV into df, DO NOT EDIT
-        df.index = pd.to_datetime(df.index, utc=True)
-        df.index.name = "time"
+        df = self._read_csv(  # converting AlphaVantage CSV into df, DO NOT EDIT
+            res,
+            "timestamp",  # daily and up only, dates
+            AlphaVantage.CSV_PARSE_OPTIONS,
+            AlphaVantage.CSV_CONVERT_OPTIONS,
+        )
         if "volume" not in df.columns:
             df["volume"] = 0
-        df = df.sort_index()
+        df = self._sort_index(df)
         return df
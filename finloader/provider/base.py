@@ -1,90 +1,251 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
 import logging
 import os
+import random
 import time
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import requests
+from requests.adapters import HTTPAdapter
 
+from .cache import TTLCache, DiskCache
 from ..core import ForexSymbol, Timeframe
-from ..schema import validate_data
+from ..schema import validate_data, REQUIRED_INDEX_NAME
+from ..utils import no_gc, collect_results, project_path
 from ..exceptions import TemporaryRateLimit, DailyRateLimit
 
 logger = logging.getLogger(__name__)
 
+_ZERO_OFFSET = timedelta(0)
+
 
 class DataProvider(ABC):
-    def __init__(self, name: str, api_key: str, *, max_retries=5, base_sleep=10, max_sleep=60):
+    MAX_RETRY_AFTER = 15 * 60  # seconds, a longer Retry-After is waited out by a later run instead
+    DAILY_RATE_LIMIT_SECONDS = 24 * 60 * 60
+
+    def __init__(
+        self,
+        name: str,
+        api_key: str,
+        *,
+        max_retries=5,
+        base_sleep=10,
+        max_sleep=60,
+        jitter=0.5,
+        concurrency=4,
+        cache_dir: str | None = None,
+        rate_limiter=None,
+    ):
         self.name = name
         self.api_key = api_key
 
+        # Max simultaneous API calls, bounded by what the provider's rate limit tolerates
+        self.concurrency = concurrency
+
+        # Keep-alive connections reused across calls, retries are handled by us.
+        # Each provider talks to one host, with at most `concurrency` requests in flight
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, max_retries=0),
+        )
+
+        # Anything with `acquire() -> bool` and `drain(seconds)`, charged once per API request,
+        # drained on a daily limit, and False means the provider is out of calls for the day
+        self.rate_limiter = rate_limiter
+
+        # Normalized responses, fresh for one bar of their timeframe,
+        # also kept on disk across runs when `cache_dir` is given
+        self._cache = TTLCache()
+        self._disk_cache = DiskCache(project_path(cache_dir) / name) if cache_dir else None
+
+        # Set while the provider refuses calls for the rest of the day, cleared by the next answered call
+        self.daily_rate_limited = False
+
         # Control multiple retries behavior
         self.max_retries = max_retries
         self.base_sleep = base_sleep
         self.max_sleep = max_sleep
+        self.jitter = jitter  # spreads out threads that were rate-limited together
 
     @classmethod
-    def from_name(cls, name: str):
+    def from_name(cls, name: str, **kwargs):
         if name == "alpha_vantage":
-            return AlphaVantage(os.getenv("ALPHA_VANTAGE_API_KEY"))
+            return AlphaVantage(os.getenv("ALPHA_VANTAGE_API_KEY"), **kwargs)
         elif name == "massive":
-            return Massive(os.getenv("MASSIVE_API_KEY"))
+            return Massive(os.getenv("MASSIVE_API_KEY"), **kwargs)
         elif name == "twelve_data":
-            return TwelveData(os.getenv("TWELVE_DATA_API_KEY"))
+            return TwelveData(os.getenv("TWELVE_DATA_API_KEY"), **kwargs)
         else:
             raise ValueError(f"Unsupported provider: {name}")
 
+    def close(self):
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     def __str__(self):
         return self.name
     
     def __repr__(self):
         return self.__class__.__name__
 
-    def get(self, s: ForexSymbol, tf: Timeframe, utc_start: pd.Timestamp) -> pd.DataFrame:
+    def get(self, s: ForexSymbol, tf: Timeframe, utc_start: pd.Timestamp, use_cache=True) -> pd.DataFrame:
         """
         `utc_start` must be in UTC, (every pd.Timestamp used must be in UTC).
+        With `use_cache`, a response fetched less than one bar ago is reused,
+        `use_cache=False` forces a refresh.
+        A provider cut short may return only the oldest part of the range, marked with
+        `df.attrs["truncated"]`, the caller then resumes from its last bar.
         """
         if utc_start.tzinfo is None:
             raise ValueError("Must be timezone-aware UTC")
-        if str(utc_start.tz) != "UTC":
+        if utc_start.utcoffset() != _ZERO_OFFSET:
             raise ValueError("Must pass UTC timestamp")
 
+        key = (s, tf.length, tf.unit, utc_start.floor(tf.timedelta))
+        ttl = tf.timedelta.total_seconds()
+        cached = self._get_cached(key, ttl) if use_cache else None
+        if cached is not None:
+            logger.info(f"Using cached {self.name} response for: '{s}' ({tf})")
+            return cached.copy(deep=False)
+
         logger.info(f"Calling {self.name} API for: '{s}' ({tf})")
-        raw = self._call_api_with_retries(s, tf, utc_start)  # handle rate-limits
+        utc_now = pd.Timestamp.now(tz="UTC")  # one clock read, shared by the whole call
+        raw = self._call_api_with_retries(s, tf, utc_start, utc_now)  # handle rate-limits
         if raw is None:
             logger.warning(f"'{s}' ({tf}) was not downloaded")
             return None
 
         df = self._normalize(raw)
         validate_data(df)
+        if df.attrs.get("truncated"):
+            return df  # not cached, the call resuming from it must reach the API
+
+        self._cache.set(key, df, ttl=ttl)
+        if self._disk_cache is not None:
+            self._disk_cache.set(self._disk_cache_name(key), df, prefix=f"{s}_{tf}_")
+        return df.copy(deep=False)
+
+    def get_many(
+        self, symbols: list[ForexSymbol], tf: Timeframe, utc_start: pd.Timestamp
+    ) -> dict[str, pd.DataFrame | None]:
+        """
+        `get` every symbol concurrently on `concurrency` threads, keyed by `str(symbol)`.
+        A failed symbol is logged and maps to None.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {pool.submit(self.get, s, tf, utc_start): f"'{s}' ({tf})" for s in symbols}
+        return dict(zip((str(s) for s in symbols), collect_results(futures, logger)))
+
+    def _get_cached(self, key: tuple, ttl: float) -> pd.DataFrame | None:
+        df = self._cache.get(key)
+        if df is None and self._disk_cache is not None:
+            df = self._disk_cache.get(self._disk_cache_name(key), ttl)
         return df
+
+    @staticmethod
+    def _disk_cache_name(key: tuple) -> str:
+        s, length, unit, utc_start = key
+        return f"{s}_{length}{unit}_{utc_start:%Y%m%dT%H%M%S}"
     
-    def _call_api_with_retries(self, s: ForexSymbol, tf: Timeframe, utc_start: pd.Timestamp) -> pd.DataFrame:
+    def _call_api_with_retries(
+        self, s: ForexSymbol, tf: Timeframe, utc_start: pd.Timestamp, utc_now: pd.Timestamp
+    ) -> pd.DataFrame:
         retries = 0
         sleep_time = self.base_sleep
 
         while retries < self.max_retries:
             try:
-                data = self._call_api(s, tf, utc_start)
+                data = self._call_api(s, tf, utc_start, utc_now)
+                self.daily_rate_limited = False  # answered again, e.g. on the next day
                 return data  # success
 
             except TemporaryRateLimit as e:
+                if e.made_progress:  # got further than last time, the retries start over
+                    retries = 0
+                    sleep_time = self.base_sleep
                 retries += 1
                 if retries >= self.max_retries:
                     logger.error(f"{s} failed (attempt {retries}/{self.max_retries}) | permanently failed")
                     break
                 else:
-                    logger.warning(f"{s} failed (attempt {retries}/{self.max_retries}) | trying again in {sleep_time}s")
-                    time.sleep(sleep_time)
+                    # the server's Retry-After wins over our own backoff, within reason
+                    if e.retry_after is not None:
+                        wait = min(e.retry_after, DataProvider.MAX_RETRY_AFTER)
+                    else:
+                        # jittered after the cap, so threads capped at the same wait still spread out
+                        wait = min(sleep_time, self.max_sleep) * (1 + self.jitter * random.random())
+                    logger.warning(f"{s} failed (attempt {retries}/{self.max_retries}) | trying again in {wait:.1f}s")
+                    time.sleep(wait)
                     sleep_time = min(sleep_time * 2, self.max_sleep)
 
             except DailyRateLimit as e:
                 logger.warning(f"{self.name}: daily rate-limited")
+                self.daily_rate_limited = True
+                if self.rate_limiter is not None:
+                    # drained here, other threads may clear the flag before anyone reads it
+                    self.rate_limiter.drain(DataProvider.DAILY_RATE_LIMIT_SECONDS)
                 break
 
         return None  # failure
 
+    def _http_get(self, url: str, **kwargs) -> requests.Response:
+        """One API request on the shared session, after taking a token from `rate_limiter`"""
+        if self.rate_limiter is not None and not self.rate_limiter.acquire():
+            raise DailyRateLimit(f"{self.name}: daily rate-limited, request skipped")
+        return self._session.get(url, **kwargs)
+
+    @staticmethod
+    def _read_csv(res, time_column: str, parse_options, convert_options) -> pd.DataFrame:
+        """
+        Parse a streamed CSV response with Arrow, straight from the socket.
+        `time_column` must be typed as naive `timestamp` in `convert_options`, its values are UTC.
+        """
+        res.raw.decode_content = True  # let urllib3 undo gzip
+        with res, no_gc():
+            table = pacsv.read_csv(res.raw, parse_options=parse_options, convert_options=convert_options)
+            # Arrow rejects naive strings as tz-aware, so the UTC label is cast on after parsing
+            time = table.column(time_column).cast(pa.timestamp("ns", tz="UTC"))
+            table = table.drop_columns(time_column).append_column(REQUIRED_INDEX_NAME, time)
+            return table.to_pandas(self_destruct=True, split_blocks=True).set_index(REQUIRED_INDEX_NAME)
+
+    @staticmethod
+    def _sort_index(df: pd.DataFrame) -> pd.DataFrame:
+        """Sort by time, APIs usually answer newest first, so that is just a reversal"""
+        if df.index.is_monotonic_increasing:
+            return df
+        if df.index.is_monotonic_decreasing:
+            return df.iloc[::-1]
+        return df.sort_index()
+
+    @staticmethod
+    def _get_retry_after(res) -> float | None:
+        """Seconds to wait from the `Retry-After` header, if any"""
+        value = res.headers.get("Retry-After")
+        if not value:
+            return None
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = pd.Timestamp(parsedate_to_datetime(value))
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.tz_localize("UTC")  # a "-0000" zone parses naive, HTTP dates are GMT anyway
+        return max((retry_at - pd.Timestamp.now(tz="UTC")).total_seconds(), 0.0)
+
     @abstractmethod
-    def _call_api(self, s: ForexSymbol, tf: Timeframe, time_start_utc: pd.Timestamp):
+    def _call_api(self, s: ForexSymbol, tf: Timeframe, time_start_utc: pd.Timestamp, utc_now: pd.Timestamp):
         pass
 
     @abstractmethod
@@ -0,0 +1,74 @@
+from pathlib import Path
+import threading
+import time
+
+import pandas as pd
+
+
+class TTLCache:
+    """Thread-safe dict whose entries expire `ttl` seconds after being set"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = {}  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                self._evict()
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [k for k, (expires_at, _) in self._data.items() if now >= expires_at]
+        for k in expired:
+            del self._data[k]
+        if len(self._data) >= self.maxsize:  # none expired, drop the oldest entry
+            del self._data[next(iter(self._data))]
+
+
+class DiskCache:
+    """Normalized responses saved as parquet in `directory`, valid `ttl` seconds after writing"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def get(self, name: str, ttl: float) -> pd.DataFrame | None:
+        path = self.directory / f"{name}.parquet"
+        try:
+            age = time.time() - path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if age >= ttl:
+            return None
+        return pd.read_parquet(path, engine="pyarrow", memory_map=True)
+
+    def set(self, name: str, df: pd.DataFrame, prefix: str):
+        """Save `df` as `name`, replacing older entries starting with `prefix`"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for old in self.directory.glob(f"{prefix}*.parquet"):
+            old.unlink(missing_ok=True)
+
+        path = self.directory / f"{name}.parquet"
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            df.to_parquet(tmp_path, engine="pyarrow", compression="zstd")
+            tmp_path.replace(path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
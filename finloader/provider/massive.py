@@ -1,68 +1,106 @@
 import logging
 
+import numpy as np
 import pandas as pd
-from polygon import RESTClient
-import urllib3
+import requests
 
 from .base import DataProvider
 from ..core import ForexSymbol, Timeframe
 from ..exceptions import TemporaryRateLimit
+from ..schema import RESPONSE_ARROW_TYPES
+from ..utils import no_gc, json_loads
 
 logger = logging.getLogger(__name__)
 
 
 class Massive(DataProvider):
     ALLOWED_TIMEFRAME_UNITS = (Timeframe.DAY, Timeframe.WEEK, Timeframe.MONTH)
+    PAGE_LIMIT = 50000  # API maximum, long histories come back in one or two pages
+    BASE_URL = "https://api.polygon.io"
 
-    def __init__(self, api_key):
-        super().__init__("massive", api_key, base_sleep=60)
+    # Aggregate fields in the API's JSON, and our names for them
+    RESPONSE_FIELDS = {"o": "open", "h": "high", "l": "low", "c": "close", "v": "volume"}
+
+    _UNIT_TO_TIMESPAN = {
+        Timeframe.MINUTE: "minute",
+        Timeframe.HOUR: "hour",
+        Timeframe.DAY: "day",
+        Timeframe.WEEK: "week",
+        Timeframe.MONTH: "month",
+    }
+
+    def __init__(self, api_key, **kwargs):
+        super().__init__("massive", api_key, base_sleep=60, **kwargs)
 
     @classmethod
     def _convert_timestamp(cls, ts: pd.Timestamp):
-        return ts.strftime("%Y-%m-%d")
+        return f"{ts.year:04d}-{ts.month:02d}-{ts.day:02d}"  # cheaper than strftime
 
     def _get_api_timespan(self, tf: Timeframe):
-        return {
-            Timeframe.MINUTE: "minute",
-            Timeframe.HOUR: "hour",
-            Timeframe.DAY: "day",
-            Timeframe.WEEK: "week",
-            Timeframe.MONTH: "month", 
-        }[tf.unit]
-    
-    def _call_api(self, s: ForexSymbol, tf: Timeframe, utc_start: pd.Timestamp):
+        return Massive._UNIT_TO_TIMESPAN[tf.unit]
+
+    def _get_page(self, url: str, params: dict | None = None) -> dict:
+        try:
+            res = self._http_get(
+                url,
+                params=params,
+                headers={"Authorization": f"Bearer {self.api_key}"},  # also valid for next_url
+                timeout=10,
+            )
+        except requests.exceptions.ConnectionError as e:
+            raise ConnectionError("Massive: not connected to the internet") from e
+
+        if res.status_code == 429:
+            raise TemporaryRateLimit(
+                "Massive: temporary rate-limited",
+                retry_after=self._get_retry_after(res),
+            )
+        if not res.ok:
+            raise ValueError("Massive: data not downloaded")
+        return json_loads(res.content)
+
+    def _call_api(self, s: ForexSymbol, tf: Timeframe, utc_start: pd.Timestamp, utc_now: pd.Timestamp):
         if tf.unit not in Massive.ALLOWED_TIMEFRAME_UNITS:
             raise ValueError(f"Massive: timeframe '{tf}' is not supported by free API")
 
-        client = RESTClient(self.api_key)
-        utc_end = pd.Timestamp.now(tz="UTC")
+        url = (
+            f"{Massive.BASE_URL}/v2/aggs/ticker/C:{s.base}{s.quote}/range/{tf.length}/{self._get_api_timespan(tf)}"
+            f"/{self._convert_timestamp(utc_start)}/{self._convert_timestamp(utc_now)}"
+        )
+        params = {"adjusted": "true", "sort": "asc", "limit": Massive.PAGE_LIMIT}
 
-        try:
-            aggs = list(client.list_aggs(
-                ticker=f"C:{s.base}{s.quote}",
-                multiplier=tf.length,
-                timespan=self._get_api_timespan(tf),
-                from_=self._convert_timestamp(utc_start),
-                to=self._convert_timestamp(utc_end),
-                adjusted="true",
-                sort="asc"
-            ))
-        except urllib3.exceptions.MaxRetryError as e:
-            root = e.__cause__ or e
-            if isinstance(root, urllib3.exceptions.NameResolutionError):  # DNS / no internet
-                raise ConnectionError("Massive: not connected to the internet") from e
-            else:
-                raise TemporaryRateLimit("Massive: temporary rate-limited") from e
-
-        if not aggs:
+        # Each page is packed into column arrays as it arrives, so only one page of dicts is alive
+        pages = []
+        while url:
+            page = self._get_page(url, params)
+            results = page.get("results")
+            if results:
+                pages.append(self._to_columns(results))
+            url = page.get("next_url")
+            params = None  # next_url already carries the query
+
+        if not pages:
             raise ValueError("Massive: data not downloaded")
-        return aggs
-
-    def _normalize(self, aggs):
-        df = pd.DataFrame(aggs)
-        if "volume" not in df.columns:
-            df["volume"] = 0
-        df.index = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
-        df.index.name = "time"
-        df.drop(["vwap", "timestamp", "transactions", "otc"], axis=1, inplace=True)
-        return df
+        if len(pages) == 1:
+            return pages[0]
+        return {key: np.concatenate([page[key] for page in pages]) for key in pages[0]}
+
+    @staticmethod
+    def _to_columns(results: list[dict]) -> dict[str, np.ndarray]:
+        """One contiguous array per field, vwap/transactions/otc are never materialized"""
+        n = len(results)
+        with no_gc():
+            columns = {"t": np.fromiter((r["t"] for r in results), dtype=np.int64, count=n)}
+            for field, name in Massive.RESPONSE_FIELDS.items():
+                dtype = RESPONSE_ARROW_TYPES[name].to_pandas_dtype()
+                columns[field] = np.fromiter((r.get(field, 0) for r in results), dtype=dtype, count=n)
+        return columns
+
+    def _normalize(self, columns: dict[str, np.ndarray]):
+        # ms -> ns is one vectorized multiply, the int64 buffer is then viewed as UTC times
+        ts_ns = (columns["t"] * 1_000_000).view("datetime64[ns]")
+        index = pd.DatetimeIndex(ts_ns, tz="UTC", name="time")
+        return pd.DataFrame(
+            {name: columns[field] for field, name in Massive.RESPONSE_FIELDS.items()},
+            index=index,
+        )
@@ -1,80 +1,163 @@
 import logging
-from io import StringIO
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import requests
 
 from .base import DataProvider
+from .cache import TTLCache
 from ..core import ForexSymbol, Timeframe
+from ..schema import RESPONSE_ARROW_TYPES, REQUIRED_COLUMNS
+from ..utils import json_loads
 from ..exceptions import TemporaryRateLimit, DailyRateLimit
 
 logger = logging.getLogger(__name__)
 
 
 class TwelveData(DataProvider):
-    def __init__(self, api_key):
-        super().__init__("twelve_data", api_key, base_sleep=60)
+    MAX_OUTPUTSIZE = 5000  # bars per request, the API maximum
+    EMPTY_WINDOW_TTL = 24 * 60 * 60  # seconds, a closed window without data stays that way
+
+    CSV_PARSE_OPTIONS = pacsv.ParseOptions(delimiter=";")
+    CSV_CONVERT_OPTIONS = pacsv.ConvertOptions(column_types={**RESPONSE_ARROW_TYPES, "datetime": pa.timestamp("ns")})
+
+    _UNIT_TO_API = {
+        Timeframe.MINUTE: "min",
+        Timeframe.HOUR: "h",
+        Timeframe.DAY: "day",
+        Timeframe.WEEK: "week",
+        Timeframe.MONTH: "month",
+    }
+
+    def __init__(self, api_key, **kwargs):
+        super().__init__("twelve_data", api_key, base_sleep=60, **kwargs)
+
+        # Closed windows the API had no data for, skipped by retries and resumed calls,
+        # which matters for a backfill starting years before the symbol's first bar
+        self._empty_windows = TTLCache(maxsize=100_000)
 
     def _get_api_symbol(self, s: ForexSymbol):
         return f"{s.base}/{s.quote}"  # must have '/' in-between
 
     def _get_api_interval(self, tf: Timeframe):
-        unit = {
-            Timeframe.MINUTE: "min",
-            Timeframe.HOUR: "h",
-            Timeframe.DAY: "day",
-            Timeframe.WEEK: "week",
-            Timeframe.MONTH: "month", 
-        }[tf.unit]
-        return f"{tf.length}{unit}"
-
-    def _get_api_start_date(self, time_start_utc: pd.Timestamp):
-        return time_start_utc.strftime("%Y-%m-%dT%H:%M:%S")
-
-    def _call_api(self, s: ForexSymbol, tf: Timeframe, time_start_utc: pd.Timestamp):
+        return f"{tf.length}{TwelveData._UNIT_TO_API[tf.unit]}"
+
+    def _get_api_date(self, ts: pd.Timestamp):
+        return ts.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def _get_windows(self, tf: Timeframe, utc_start: pd.Timestamp, utc_now: pd.Timestamp):
+        """
+        Split [`utc_start`, `utc_now`] into ranges of at most `MAX_OUTPUTSIZE` bars, oldest first.
+        Boundaries sit on a fixed grid, so a call resuming from a later start shares its windows.
+        """
+        span = tf.timedelta * TwelveData.MAX_OUTPUTSIZE
+        windows = []
+        lo = utc_start
+        hi = utc_start.floor(span) + span
+        while hi < utc_now:
+            windows.append((lo, hi - pd.Timedelta(seconds=1)))  # the next window owns the boundary
+            lo = hi
+            hi += span
+        windows.append((lo, None))  # the last window runs up to now
+        return windows
+
+    def _call_api(self, s: ForexSymbol, tf: Timeframe, time_start_utc: pd.Timestamp, utc_now: pd.Timestamp):
+        """
+        Fetch the range window by window, the API silently stops at `MAX_OUTPUTSIZE` bars.
+        Return the windows with data and whether a rate limit cut the range short:
+        the oldest windows are then returned to be saved, the caller resumes after them.
+        """
+        frames = []
+        fetched = False  # any window answered in this call
+        for lo, hi in self._get_windows(tf, time_start_utc, utc_now):
+            key = (s, tf, lo, hi)
+            if hi is not None and self._empty_windows.get(key):
+                continue
+            try:
+                res = self._request(s, tf, lo, hi)
+            except (TemporaryRateLimit, DailyRateLimit) as e:
+                if frames:
+                    logger.warning(f"TwelveData: rate-limited, '{s}' ({tf}) returned up to {lo}")
+                    return frames, True
+                if isinstance(e, TemporaryRateLimit):
+                    raise TemporaryRateLimit(str(e), retry_after=e.retry_after, made_progress=fetched) from e
+                raise
+            fetched = True
+
+            df = None
+            if res is not None:
+                df = self._read_csv(  # converting Twelve Data CSV, DO NOT EDIT
+                    res,
+                    "datetime",
+                    TwelveData.CSV_PARSE_OPTIONS,
+                    TwelveData.CSV_CONVERT_OPTIONS,
+                )
+            if df is None or df.empty:  # no data in this window
+                if hi is not None:
+                    self._empty_windows.set(key, True, ttl=TwelveData.EMPTY_WINDOW_TTL)
+                continue
+            frames.append(df)
+
+        return frames, False  # no frames when no window had data
+
+    def _request(self, s: ForexSymbol, tf: Timeframe, lo: pd.Timestamp, hi: pd.Timestamp | None):
         params = {
             "symbol": self._get_api_symbol(s),
             "interval": self._get_api_interval(tf),
-            "start_date": self._get_api_start_date(time_start_utc),
+            "start_date": self._get_api_date(lo),
+            "outputsize": TwelveData.MAX_OUTPUTSIZE,
             "timezone": "UTC",
             "format": "CSV",  # API data sending format, DO NOT EDIT
             "apikey": self.api_key
         }
+        if hi is not None:
+            params["end_date"] = self._get_api_date(hi)
         try:
-            res = requests.get("https://api.twelvedata.com/time_series", params, timeout=10)
+            res = self._http_get("https://api.twelvedata.com/time_series", params=params, timeout=10, stream=True)
         except requests.exceptions.ConnectionError as e:
             raise ConnectionError("Not connected to the internet")
 
+        if res.status_code == 429:
+            raise TemporaryRateLimit(
+                "TwelveData: temporary rate-limited",
+                retry_after=self._get_retry_after(res),
+            )
         if not res.ok:
             raise ValueError("TwelveData: data not downloaded")
 
         content_type = res.headers.get("Content-Type", "")
         if "json" in content_type.lower():
-            data = res.json()
+            data = json_loads(res.content)
             match data["code"]:
                 case 400:  # No data is available on the specified dates
                     return None
                 case 429:  # rate limited
-                    raise TemporaryRateLimit("TwelveData: temporary rate limited")
+                    raise TemporaryRateLimit(
+                        "TwelveData: temporary rate limited",
+                        retry_after=self._get_retry_after(res),
+                    )
                 case _:
                     raise ValueError("Twelve data: unhandled error code")
 
         return res
 
-    def _normalize(self, res):
-        if res is None:
-            df = pd.DataFrame(columns=["open", "high", "low", "close", "volume"])
-        else:
-            df = pd.read_csv(  # converting Twelve Data CSV, DO NOT EDIT
-                StringIO(res.text),
-                sep=";",
-                index_col="datetime",
-                parse_dates=True
+    def _normalize(self, raw: tuple[list[pd.DataFrame], bool]):
+        frames, truncated = raw
+        if not frames:  # no data, still a valid, typed frame
+            index = pd.DatetimeIndex([], tz="UTC", name="time")
+            return pd.DataFrame(
+                {col: np.empty(0, dtype=RESPONSE_ARROW_TYPES[col].to_pandas_dtype()) for col in REQUIRED_COLUMNS},
+                index=index,
             )
-            if "volume" not in df.columns:
-                df["volume"] = 0
 
-        df.index.name = "time"
-        df.index = pd.to_datetime(df.index, utc=True)
-        df = df.sort_index(ascending=True)
+        # Windows are disjoint and oldest first, sorting each one orders the whole,
+        # so they are joined once, as they are
+        frames = [self._sort_index(df) for df in frames]
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, sort=False)
+        if "volume" not in df.columns:
+            df["volume"] = 0
+        if truncated:
+            df.attrs["truncated"] = True
         return df
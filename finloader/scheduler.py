@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+
+from .core import ForexSymbol, Timeframe
+from .downloader import Downloader
+from .provider import DataProvider
+from .utils import collect_results
+
+logger = logging.getLogger(__name__)
+
+# Free-tier API calls allowed per provider, as (calls, per seconds)
+DEFAULT_RATE_LIMITS = {
+    "alpha_vantage": (5, 60),
+    "massive": (5, 60),
+    "twelve_data": (8, 60),
+}
+
+
+class TokenBucket:
+    """Thread-safe limiter allowing `rate` acquisitions per `per` seconds"""
+
+    def __init__(self, rate: int, per: float = 60):
+        self.rate = rate
+        self.per = per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._drained_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Block until a token is free, return False if the bucket is drained"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._drained_until:
+                    return False
+
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) * self.per / self.rate
+            time.sleep(wait)
+
+    def drain(self, seconds: float):
+        """Refuse every acquisition for the next `seconds`, an ongoing drain is not extended"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._drained_until:
+                return
+            self._tokens = 0.0
+            self._drained_until = now + seconds
+
+
+def download_many_providers(
+    pairs_by_provider: dict[DataProvider, list[tuple[ForexSymbol, Timeframe]]],
+    data_dir: str | None = None,
+    buckets: dict[str, TokenBucket] | None = None,
+):
+    """
+    Download from several providers in parallel, each within its own rate limit.
+    - Every provider gets `concurrency` threads and a `TokenBucket` from `buckets` (by name),
+      or one built from `DEFAULT_RATE_LIMITS`, charged once per API request.
+    - Once a provider hits its daily limit, its remaining pairs are skipped.
+    - A failed pair is logged and does not stop the others.
+    """
+    buckets = buckets or {}
+    futures = {}
+    pools = []
+    limiters = {provider: provider.rate_limiter for provider in pairs_by_provider}
+    try:
+        for provider, pairs in pairs_by_provider.items():
+            downloader = Downloader(provider, data_dir)
+            bucket = buckets.get(provider.name) or TokenBucket(*DEFAULT_RATE_LIMITS.get(provider.name, (5, 60)))
+            provider.rate_limiter = bucket
+            stale = downloader.stale_pairs(pairs)  # up-to-date pairs cost no tokens
+
+            pool = ThreadPoolExecutor(max_workers=provider.concurrency)
+            pools.append(pool)
+            for s, tf in stale:
+                future = pool.submit(downloader.download, s, tf)
+                futures[future] = f"{provider} '{s}' ({tf})"
+    finally:
+        for pool in pools:
+            pool.shutdown(wait=True)
+        for provider, limiter in limiters.items():
+            provider.rate_limiter = limiter
+
+    collect_results(futures, logger)
+
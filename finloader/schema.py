@@ -1,9 +1,31 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 
 FILE_EXTENSION = "parquet"
 
 REQUIRED_INDEX_NAME = "time"
 REQUIRED_COLUMNS = ["open", "high", "low", "close", "volume"]
+_REQUIRED_COLUMNS_SET = frozenset(REQUIRED_COLUMNS)
+
+# Parsed API responses, spares the CSV parser from inferring types.
+# Prices are parsed straight to float32 like on disk, volume stays float64
+# as float32 would round counts above 2**24 before the uint32 cast.
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+RESPONSE_ARROW_TYPES = {
+    **{col: pa.float32() for col in PRICE_COLUMNS},
+    "volume": pa.float64(),
+}
+
+# On-disk schema, forex prices fit comfortably in float32
+EXPECTED_SCHEMA = pa.schema([
+    pa.field("open", pa.float32(), nullable=False),
+    pa.field("high", pa.float32(), nullable=False),
+    pa.field("low", pa.float32(), nullable=False),
+    pa.field("close", pa.float32(), nullable=False),
+    pa.field("volume", pa.uint32(), nullable=False),
+    pa.field(REQUIRED_INDEX_NAME, pa.timestamp("ns", tz="UTC"), nullable=False),
+])
 
 
 def validate_data(df):
@@ -13,12 +35,28 @@ def validate_data(df):
         raise ValueError("Invalid data type, not a pd.DataFrame")        
 
     if df.index.name != REQUIRED_INDEX_NAME \
-        or not all(col in df.columns for col in REQUIRED_COLUMNS):
+        or not _REQUIRED_COLUMNS_SET.issubset(df.columns):
         raise ValueError("Schema mismatch")
     
     if df.index.tz is None:
         raise ValueError("df's index must be UTC")
-    if not df.index.is_monotonic_increasing:
+
+    # One pass over the raw int64 timestamps covers both order and duplicates
+    diffs = np.diff(df.index.asi8)
+    if (diffs < 0).any():
         raise ValueError("df's index must be sorted")
-    if df.index.has_duplicates:
+    if (diffs == 0).any():
         raise ValueError("Duplicate timestamps detected in df")
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Convert to an Arrow table with `EXPECTED_SCHEMA`.
+    The cast also rejects NaN prices and volumes that are negative or fractional.
+    """
+    table = pa.Table.from_pandas(df)
+    schema = EXPECTED_SCHEMA.with_metadata(table.schema.metadata)  # keep pandas' index info
+    try:
+        return table.select(schema.names).cast(schema, safe=True)
+    except ValueError as e:  # includes pa.ArrowInvalid
+        raise ValueError(f"Schema mismatch: {e}") from e
@@ -0,0 +1,71 @@
+from concurrent.futures import Future
+from contextlib import contextmanager
+import gc
+import json
+import logging
+from pathlib import Path
+import threading
+
+try:
+    import orjson  # optional, parses several times faster than json
+except ImportError:
+    orjson = None
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+_no_gc_lock = threading.Lock()
+_no_gc_depth = 0  # threads currently inside no_gc()
+_gc_was_enabled = False
+
+
+@contextmanager
+def no_gc():
+    """
+    Pause the cyclic garbage collector around bulk DataFrame building.
+    Those allocations never form cycles, so GC passes over them are wasted.
+    The collector is global, it is restored only when the last thread leaves.
+    """
+    global _no_gc_depth, _gc_was_enabled
+
+    with _no_gc_lock:
+        if _no_gc_depth == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _no_gc_depth += 1
+    try:
+        yield
+    finally:
+        with _no_gc_lock:
+            _no_gc_depth -= 1
+            if _no_gc_depth == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+def project_path(path: str) -> Path:
+    """`path` from the settings, relative ones are taken from the project root, not the working directory"""
+    return _PROJECT_ROOT / path
+
+
+def collect_results(futures: dict[Future, str], logger: logging.Logger) -> list:
+    """
+    Wait for `futures`, mapped to a label for log messages, return their results in order.
+    A failed future is logged, a ValueError without traceback, and gives None.
+    """
+    results = []
+    for future, label in futures.items():
+        try:
+            results.append(future.result())
+        except ValueError as e:
+            logger.error(f"{label}: {e}")
+            results.append(None)
+        except Exception:
+            logger.exception(f"{label}: unhandled error")
+            results.append(None)
+    return results
+
+
+def json_loads(content: bytes):
+    """Parse a JSON response body, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from finloader.provider import DataProvider
+
+
+@pytest.fixture
+def make_data():
+    """Factory of daily bars, `price` and `volume` are one value or one per bar"""
+    def make(start="2024-01-01", periods=None, price=1.0, volume=1):
+        if periods is None:
+            periods = len(price) if isinstance(price, list) else 3
+        index = pd.date_range(start, periods=periods, freq="D", tz="UTC", name="time")
+        return pd.DataFrame(
+            {"open": price, "high": price, "low": price, "close": price, "volume": volume},
+            index=index,
+        )
+    return make
+
+
+class FakeProvider(DataProvider):
+    """Serves `data` for every symbol except GBP ones, which fail"""
+
+    def __init__(self, data, **kwargs):
+        super().__init__("fake", "key", **kwargs)
+        self.data = data
+
+    def _call_api(self, s, tf, utc_start, utc_now):
+        if s.base == "GBP":
+            raise ValueError("no such symbol")
+        return self.data
+
+    def _normalize(self, data):
+        return data
+
+
+@pytest.fixture
+def fake_provider(make_data):
+    return FakeProvider(make_data())
@@ -1,9 +1,12 @@
-from unittest.mock import patch, Mock
+from io import BytesIO
+from unittest.mock import patch, Mock, MagicMock
+import json
 import pytest
 import pandas as pd
 
 from finloader.core import ForexSymbol, Timeframe
 from finloader.provider import AlphaVantage
+from finloader.schema import validate_data
 from finloader.exceptions import TemporaryRateLimit, DailyRateLimit
 
 
@@ -15,18 +18,18 @@ def mock_alpha_vantage_rate_limit(*args, **kwargs):
         "Content-Type": "application/json"
     }
 
-    mock_resp.json.return_value = {
+    mock_resp.content = json.dumps({
         "Information":
         "Thank you for using Alpha Vantage! "
         "Please consider spreading out your free API requests more sparingly (1 request per second). "
         "You may subscribe to any of the premium plans at https://www.alphavantage.co/premium/ "
         "to lift the free key rate limit (25 requests per day), "
         "raise the per-second burst limit, and instantly unlock all premium endpoints"
-    }
+    }).encode()
     return mock_resp
 
 
-@patch("requests.get", side_effect=mock_alpha_vantage_rate_limit)
+@patch("requests.Session.get", side_effect=mock_alpha_vantage_rate_limit)
 def test_alpha_vantage_rate_limit(mock_get):
     provider = AlphaVantage(api_key="fake")
 
@@ -34,5 +37,42 @@ def test_alpha_vantage_rate_limit(mock_get):
         provider._call_api(
             ForexSymbol("EUR", "USD"),
             Timeframe(1, "day"),
-            pd.Timestamp("2025-01-01", tz="UTC")
+            pd.Timestamp("2025-01-01", tz="UTC"),
+            pd.Timestamp("2025-06-01", tz="UTC"),
+        )
+
+
+def mock_alpha_vantage_too_many_requests(*args, **kwargs):
+    mock_resp = Mock()
+    mock_resp.status_code = 429
+    mock_resp.ok = False
+    mock_resp.headers = {"Retry-After": "30"}
+    return mock_resp
+
+
+@patch("requests.Session.get", side_effect=mock_alpha_vantage_too_many_requests)
+def test_alpha_vantage_retry_after(mock_get):
+    provider = AlphaVantage(api_key="fake")
+
+    with pytest.raises(TemporaryRateLimit) as exc_info:
+        provider._call_api(
+            ForexSymbol("EUR", "USD"),
+            Timeframe(1, "day"),
+            pd.Timestamp("2025-01-01", tz="UTC"),
+            pd.Timestamp("2025-06-01", tz="UTC"),
         )
+    assert exc_info.value.retry_after == 30
+
+
+def test_alpha_vantage_normalize():
+    mock_resp = MagicMock()
+    mock_resp.raw = BytesIO(
+        b"timestamp,open,high,low,close\r\n"
+        b"2025-01-03,1.1,1.3,1.0,1.2\r\n"
+        b"2025-01-02,1.0,1.2,0.9,1.1\r\n"
+    )
+    df = AlphaVantage(api_key="fake")._normalize(mock_resp)
+
+    validate_data(df)
+    assert df.index[0] == pd.Timestamp("2025-01-02", tz="UTC")
+    assert df["close"].tolist() == pd.Series([1.1, 1.2], dtype="float32").tolist()
@@ -0,0 +1,58 @@
+from unittest.mock import patch, Mock
+import logging
+import pandas as pd
+import pytest
+
+from finloader.core import ForexSymbol, Timeframe
+from finloader.provider import DataProvider, TwelveData
+from finloader.exceptions import TemporaryRateLimit
+from finloader.utils import project_path
+
+
+def test_get_many_isolates_failed_symbol(fake_provider, caplog):
+    symbols = [ForexSymbol("EUR", "USD"), ForexSymbol("GBP", "USD")]
+
+    with caplog.at_level(logging.ERROR):
+        results = fake_provider.get_many(symbols, Timeframe(1, "day"), pd.Timestamp("2024-01-01", tz="UTC"))
+
+    assert len(results["EURUSD"]) == 3
+    assert results["GBPUSD"] is None
+    assert "no such symbol" in caplog.text
+
+
+def test_cache_dir_is_relative_to_project_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    provider = TwelveData(api_key="fake", cache_dir=".cache")
+
+    assert provider._disk_cache.directory == project_path(".cache") / "twelve_data"
+    assert TwelveData(api_key="fake", cache_dir=str(tmp_path))._disk_cache.directory == tmp_path / "twelve_data"
+
+
+@pytest.mark.parametrize("retry_after, expected", [
+    (None, 60 * 1.25),  # capped backoff, then jittered
+    (24 * 60 * 60, DataProvider.MAX_RETRY_AFTER),
+])
+def test_retry_wait(fake_provider, retry_after, expected):
+    fake_provider.base_sleep = fake_provider.max_sleep = 60
+    with patch.object(fake_provider, "_call_api", side_effect=TemporaryRateLimit(retry_after=retry_after)), \
+            patch("finloader.provider.base.random.random", return_value=0.5), \
+            patch("finloader.provider.base.time.sleep") as sleep:
+        fake_provider._call_api_with_retries(
+            ForexSymbol("EUR", "USD"),
+            Timeframe(1, "day"),
+            pd.Timestamp("2024-01-01", tz="UTC"),
+            pd.Timestamp("2024-02-01", tz="UTC"),
+        )
+
+    assert sleep.call_count == fake_provider.max_retries - 1
+    assert sleep.call_args.args[0] == expected
+
+
+@pytest.mark.parametrize("header", [
+    "Wed, 21 Oct 2015 07:28:00 GMT",
+    "Wed, 21 Oct 2015 07:28:00 -0000",  # parsed as a naive datetime
+])
+def test_get_retry_after_past_http_date(header):
+    res = Mock(headers={"Retry-After": header})
+
+    assert DataProvider._get_retry_after(res) == 0.0
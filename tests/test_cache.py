@@ -0,0 +1,22 @@
+import pandas as pd
+
+from finloader.provider.cache import TTLCache, DiskCache
+
+
+def test_ttl_cache_expires():
+    cache = TTLCache()
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=0)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+
+def test_disk_cache_round_trip_and_replace(tmp_path, make_data):
+    cache = DiskCache(tmp_path)
+    cache.set("EURUSD_1day_1", make_data(), prefix="EURUSD_1day_")
+    cache.set("EURUSD_1day_2", make_data(), prefix="EURUSD_1day_")
+
+    assert [p.name for p in tmp_path.iterdir()] == ["EURUSD_1day_2.parquet"]
+    pd.testing.assert_frame_equal(cache.get("EURUSD_1day_2", ttl=60), make_data(), check_freq=False)
+    assert cache.get("EURUSD_1day_2", ttl=0) is None
@@ -0,0 +1,28 @@
+import atexit
+import logging
+from logging.handlers import MemoryHandler
+
+from finloader.cli import setup_logging, _flush_logs
+
+
+def test_setup_logging_twice_closes_old_file_handler(tmp_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    try:
+        setup_logging(str(tmp_path / "finloader.log"))
+        old_file = next(h for h in root.handlers if isinstance(h, MemoryHandler)).target
+        setup_logging(str(tmp_path / "finloader.log"))
+
+        assert old_file.stream is None  # closed, not leaked
+        assert registered == [_flush_logs, _flush_logs]  # the same function, unregistered in between
+    finally:
+        for h in root.handlers[:]:
+            root.removeHandler(h)
+            for handler in (h, getattr(h, "target", None)):
+                if handler is not None:
+                    handler.close()
+        for h in handlers:
+            root.addHandler(h)
+        root.setLevel(level)
@@ -0,0 +1,109 @@
+from unittest.mock import Mock
+import shutil
+import pandas as pd
+import pyarrow.parquet as pq
+
+from finloader.core import ForexSymbol, Timeframe
+from finloader.downloader import Downloader, SymbolFile
+
+
+def make_symbol_file(tmp_path):
+    provider = Mock()
+    provider.name = "fake"
+    downloader = Downloader(provider, str(tmp_path))
+    symbol_file = SymbolFile(downloader.provider_dir, ForexSymbol("EUR", "USD"), Timeframe(1, "day"))
+    return downloader, symbol_file
+
+
+def test_save_appends_newer_data(tmp_path, make_data):
+    downloader, symbol_file = make_symbol_file(tmp_path)
+
+    downloader._save(make_data("2024-01-01", 10, 1.0), symbol_file)
+    downloader._save(make_data("2024-01-11", 5, 2.0), symbol_file)
+
+    df = pd.read_parquet(symbol_file.path)
+    assert len(df) == 15
+    assert df.index.is_monotonic_increasing
+    assert symbol_file.latest_utc() == pd.Timestamp("2024-01-15", tz="UTC")
+
+
+def test_save_overlap_keeps_latest_values(tmp_path, make_data):
+    downloader, symbol_file = make_symbol_file(tmp_path)
+
+    downloader._save(make_data("2024-01-01", 10, 1.0), symbol_file)
+    downloader._save(make_data("2024-01-08", 5, 2.0), symbol_file)
+
+    df = pd.read_parquet(symbol_file.path)
+    assert len(df) == 12
+    assert not df.index.has_duplicates
+    assert df["close"].tolist() == [1.0] * 7 + [2.0] * 5
+
+
+def test_save_overlap_keeps_rows_missing_from_new_data(tmp_path, make_data):
+    downloader, symbol_file = make_symbol_file(tmp_path)
+
+    downloader._save(make_data("2024-01-01", 10, 1.0), symbol_file)
+    gappy = make_data("2024-01-08", 5, 2.0).drop(pd.Timestamp("2024-01-09", tz="UTC"))
+    downloader._save(gappy, symbol_file)
+
+    df = pd.read_parquet(symbol_file.path)
+    assert len(df) == 12
+    assert df.index.is_monotonic_increasing
+    assert df.loc["2024-01-09", "close"].item() == 1.0
+
+
+def test_save_writes_one_row_group_per_year(tmp_path, make_data):
+    downloader, symbol_file = make_symbol_file(tmp_path)
+
+    downloader._save(make_data("2023-12-01", 40, 1.0), symbol_file)
+    downloader._save(make_data("2024-01-10", 5, 2.0), symbol_file)
+
+    pf = pq.ParquetFile(symbol_file.path)
+    assert pf.num_row_groups == 2
+    assert pf.metadata.row_group(0).num_rows == 31
+
+
+def test_need_update_uses_given_now(tmp_path, make_data):
+    downloader, symbol_file = make_symbol_file(tmp_path)
+    downloader._save(make_data("2024-01-01", 10, 1.0), symbol_file)
+
+    assert not symbol_file.need_update(now=pd.Timestamp("2024-01-10 12:00", tz="UTC"))
+    assert symbol_file.need_update(now=pd.Timestamp("2024-01-11 12:00", tz="UTC"))
+
+
+def test_latest_utc_cache_ignores_rewritten_file(tmp_path, make_data):
+    downloader, symbol_file = make_symbol_file(tmp_path)
+    downloader._save(make_data("2024-01-01", 10, 1.0), symbol_file)
+    key = (str(symbol_file.symbol), str(symbol_file.tf))
+
+    assert downloader._need_update(symbol_file.symbol, symbol_file.tf)
+    assert downloader._latest_utc_cache[key][1] == pd.Timestamp("2024-01-10", tz="UTC")
+
+    # another process appends to the file
+    other = SymbolFile(downloader.provider_dir, symbol_file.symbol, symbol_file.tf)
+    downloader._save(make_data("2024-01-11", 5, 2.0), other)
+
+    cached = downloader._symbol_file(key, symbol_file.symbol, symbol_file.tf)
+    assert cached.latest_utc() == pd.Timestamp("2024-01-15", tz="UTC")
+
+
+def test_download_many_isolates_failed_pair(tmp_path, fake_provider, caplog):
+    downloader = Downloader(fake_provider, str(tmp_path))
+    tf = Timeframe(1, "day")
+
+    downloader.download_many([(ForexSymbol("EUR", "USD"), tf), (ForexSymbol("GBP", "USD"), tf)])
+
+    assert SymbolFile(downloader.provider_dir, ForexSymbol("EUR", "USD"), tf).exists()
+    assert not SymbolFile(downloader.provider_dir, ForexSymbol("GBP", "USD"), tf).exists()
+    assert "no such symbol" in caplog.text
+
+
+def test_save_recreates_deleted_symbol_dir(tmp_path, make_data):
+    downloader, symbol_file = make_symbol_file(tmp_path)
+    downloader._save(make_data("2024-01-01", 10, 1.0), symbol_file)
+
+    shutil.rmtree(symbol_file.dir)  # e.g. cleaned up while the process runs
+    symbol_file = SymbolFile(downloader.provider_dir, symbol_file.symbol, symbol_file.tf)
+    downloader._save(make_data("2024-01-01", 10, 1.0), symbol_file)
+
+    assert symbol_file.exists()
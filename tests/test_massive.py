@@ -0,0 +1,44 @@
+from unittest.mock import patch, Mock
+import json
+import pandas as pd
+
+from finloader.core import ForexSymbol, Timeframe
+from finloader.provider import Massive
+from finloader.schema import validate_data
+
+
+def make_bar(day, price):
+    t = pd.Timestamp(f"2025-01-{day:02d}", tz="UTC").value // 1_000_000
+    return {"v": 10, "vw": price, "o": price, "c": price, "h": price, "l": price, "t": t, "n": 1}
+
+
+def mock_massive_pages(url, params=None, **kwargs):
+    mock_resp = Mock()
+    mock_resp.status_code = 200
+    mock_resp.ok = True
+    if "cursor" not in url:
+        mock_resp.content = json.dumps({
+            "results": [make_bar(1, 1.0), make_bar(2, 1.1)],
+            "next_url": "https://api.polygon.io/v2/aggs/next?cursor=abc",
+        }).encode()
+    else:
+        mock_resp.content = json.dumps({"results": [make_bar(3, 1.2)]}).encode()
+    return mock_resp
+
+
+@patch("requests.Session.get", side_effect=mock_massive_pages)
+def test_massive_follows_next_url(mock_get):
+    provider = Massive(api_key="fake")
+
+    results = provider._call_api(
+        ForexSymbol("EUR", "USD"),
+        Timeframe(1, "day"),
+        pd.Timestamp("2025-01-01", tz="UTC"),
+        pd.Timestamp("2025-01-04", tz="UTC"),
+    )
+    df = provider._normalize(results)
+
+    assert mock_get.call_count == 2
+    validate_data(df)
+    assert list(df.columns) == ["open", "high", "low", "close", "volume"]
+    assert df.index[-1] == pd.Timestamp("2025-01-03", tz="UTC")
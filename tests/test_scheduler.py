@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+from finloader.core import ForexSymbol, Timeframe
+from finloader.downloader import Downloader, SymbolFile
+from finloader.exceptions import DailyRateLimit
+from finloader.scheduler import TokenBucket, download_many_providers
+
+
+def test_token_bucket_allows_burst_up_to_rate():
+    bucket = TokenBucket(rate=3, per=60)
+
+    assert all(bucket.acquire() for _ in range(3))
+    assert bucket._tokens < 1
+
+
+def test_token_bucket_drain_refuses_acquire():
+    bucket = TokenBucket(rate=3, per=60)
+    bucket.drain(60)
+
+    assert not bucket.acquire()
+
+
+def test_download_many_providers_isolates_failed_pair(tmp_path, fake_provider, caplog):
+    tf = Timeframe(1, "day")
+    pairs = [(ForexSymbol("EUR", "USD"), tf), (ForexSymbol("GBP", "USD"), tf)]
+
+    download_many_providers({fake_provider: pairs}, data_dir=str(tmp_path))
+
+    assert SymbolFile(tmp_path / "fake", ForexSymbol("EUR", "USD"), tf).exists()
+    assert not SymbolFile(tmp_path / "fake", ForexSymbol("GBP", "USD"), tf).exists()
+    assert "no such symbol" in caplog.text
+
+
+def test_daily_rate_limit_drains_bucket_and_is_lifted_next_day(tmp_path, fake_provider):
+    downloader = Downloader(fake_provider, str(tmp_path))
+    tf = Timeframe(1, "day")
+    fake_provider.rate_limiter = TokenBucket(rate=3)
+
+    with patch.object(fake_provider, "_call_api", side_effect=DailyRateLimit("daily rate-limited")):
+        downloader.download(ForexSymbol("EUR", "USD"), tf)
+    assert fake_provider.daily_rate_limited
+    assert not fake_provider.rate_limiter.acquire()  # drained where the limit was seen
+
+    # the next day, with a fresh bucket, every pair is downloaded
+    fake_provider.rate_limiter = TokenBucket(rate=3)
+    for quote in ("USD", "JPY"):
+        downloader.download(ForexSymbol("EUR", quote), tf)
+
+    assert not fake_provider.daily_rate_limited
+    assert fake_provider.rate_limiter.acquire()
+    assert SymbolFile(downloader.provider_dir, ForexSymbol("EUR", "JPY"), tf).exists()
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from finloader.schema import validate_data, to_table, EXPECTED_SCHEMA
+
+
+def test_to_table_casts_to_expected_schema(make_data):
+    table = to_table(make_data(price=[1.1, 1.2], volume=[1, 2]))
+    assert table.schema.equals(EXPECTED_SCHEMA)
+    assert table.to_pandas().index.name == "time"
+
+
+@pytest.mark.parametrize("close, volume", [
+    ([1.1, np.nan], [1, 2]),  # missing price
+    ([1.1, 1.2], [-1, 2]),  # negative volume
+])
+def test_to_table_rejects_invalid_values(close, volume, make_data):
+    with pytest.raises(ValueError):
+        to_table(make_data(price=close, volume=volume))
+
+
+@pytest.mark.parametrize("order, message", [
+    ([1, 0], "sorted"),
+    ([0, 0], "Duplicate"),
+])
+def test_validate_data_rejects_bad_index(order, message, make_data):
+    df = make_data(price=[1.1, 1.2], volume=[1, 2])
+    df.index = df.index[order]
+    with pytest.raises(ValueError, match=message):
+        validate_data(df)
@@ -0,0 +1,133 @@
+from io import BytesIO
+from unittest.mock import patch, Mock, MagicMock
+import pytest
+import pandas as pd
+
+from finloader.core import ForexSymbol, Timeframe
+from finloader.provider import TwelveData
+from finloader.schema import validate_data
+from finloader.exceptions import TemporaryRateLimit
+from finloader.scheduler import TokenBucket
+
+
+def mock_twelve_data_csv(*args, **kwargs):
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.ok = True
+    mock_resp.headers = {"Content-Type": "text/csv"}
+    mock_resp.raw = BytesIO(
+        b"datetime;open;high;low;close\n"
+        b"2025-01-02 10:00:00;1.1;1.3;1.0;1.2\n"
+        b"2025-01-02 09:00:00;1.0;1.2;0.9;1.1\n"
+    )
+    return mock_resp
+
+
+@patch("requests.Session.get", side_effect=mock_twelve_data_csv)
+def test_twelve_data_normalize(mock_get):
+    provider = TwelveData(api_key="fake")
+    frames = provider._call_api(
+        ForexSymbol("EUR", "USD"),
+        Timeframe(1, "hour"),
+        pd.Timestamp("2025-01-02 09:00", tz="UTC"),
+        pd.Timestamp("2025-01-02 11:00", tz="UTC"),
+    )
+    df = provider._normalize(frames)
+
+    validate_data(df)
+    assert df.index[0] == pd.Timestamp("2025-01-02 09:00", tz="UTC")
+    assert df["close"].dtype == "float32"
+    assert df["close"].tolist() == pd.Series([1.1, 1.2], dtype="float32").tolist()
+    assert (df["volume"] == 0).all()
+
+
+def mock_twelve_data_no_data(*args, **kwargs):
+    mock_resp = Mock()
+    mock_resp.status_code = 200
+    mock_resp.ok = True
+    mock_resp.headers = {"Content-Type": "application/json"}
+    mock_resp.content = b'{"code": 400, "message": "No data is available on the specified dates"}'
+    return mock_resp
+
+
+@patch("requests.Session.get", side_effect=mock_twelve_data_no_data)
+def test_twelve_data_get_no_data(mock_get):
+    df = TwelveData(api_key="fake").get(
+        ForexSymbol("EUR", "USD"),
+        Timeframe(1, "hour"),
+        pd.Timestamp("2025-01-02 09:00", tz="UTC"),
+    )
+
+    validate_data(df)
+    assert df.empty
+    assert (df[["open", "high", "low", "close"]].dtypes == "float32").all()
+
+
+def test_twelve_data_windows_cover_range():
+    tf = Timeframe(1, "day")
+    start = pd.Timestamp("2000-01-01", tz="UTC")
+    now = start + tf.timedelta * (2 * TwelveData.MAX_OUTPUTSIZE + 10)
+
+    windows = TwelveData(api_key="fake")._get_windows(tf, start, now)
+
+    assert windows[0][0] == start
+    for lo, hi in windows[:-1]:
+        assert hi - lo < tf.timedelta * TwelveData.MAX_OUTPUTSIZE
+    for (_, hi), (lo, _) in zip(windows, windows[1:]):
+        assert lo == hi + pd.Timedelta(seconds=1)
+    assert windows[-1][1] is None
+
+    # a call resuming later in the range shares the remaining windows
+    later = TwelveData(api_key="fake")._get_windows(tf, windows[1][0] + tf.timedelta, now)
+    assert later[1:] == windows[2:]
+
+
+@patch("requests.Session.get", side_effect=mock_twelve_data_csv)
+def test_twelve_data_takes_a_token_per_window(mock_get):
+    provider = TwelveData(api_key="fake", rate_limiter=TokenBucket(rate=10))
+    tf = Timeframe(1, "hour")
+    start = pd.Timestamp("2000-01-01", tz="UTC")
+
+    provider._call_api(ForexSymbol("EUR", "USD"), tf, start, start + tf.timedelta * (2 * TwelveData.MAX_OUTPUTSIZE + 10))
+
+    assert mock_get.call_count == 3
+    assert 6 < provider.rate_limiter._tokens < 8
+
+
+def mock_twelve_data_json(code):
+    mock_resp = Mock()
+    mock_resp.status_code = 200
+    mock_resp.ok = True
+    mock_resp.headers = {"Content-Type": "application/json"}
+    mock_resp.content = f'{{"code": {code}}}'.encode()
+    return mock_resp
+
+
+def test_twelve_data_rate_limit_returns_fetched_windows():
+    provider = TwelveData(api_key="fake")
+    tf = Timeframe(1, "hour")
+    start = pd.Timestamp("2025-01-02 09:00", tz="UTC")  # a few windows before now
+    responses = [mock_twelve_data_csv(), mock_twelve_data_json(429)]
+
+    with patch("requests.Session.get", side_effect=responses):
+        df = provider.get(ForexSymbol("EUR", "USD"), tf, start)
+
+    assert len(df) == 2
+    assert df.attrs["truncated"]
+
+
+def test_twelve_data_skips_empty_windows_on_retry():
+    provider = TwelveData(api_key="fake")
+    s, tf = ForexSymbol("EUR", "USD"), Timeframe(1, "hour")
+    start = pd.Timestamp("2000-01-01", tz="UTC")
+    now = start + tf.timedelta * (3 * TwelveData.MAX_OUTPUTSIZE)
+
+    with patch("requests.Session.get", side_effect=[mock_twelve_data_json(400), mock_twelve_data_json(429)]):
+        with pytest.raises(TemporaryRateLimit) as exc_info:
+            provider._call_api(s, tf, start, now)
+    assert exc_info.value.made_progress
+
+    with patch("requests.Session.get", side_effect=mock_twelve_data_csv) as mock_get:
+        frames, truncated = provider._call_api(s, tf, start, now)
+    assert mock_get.call_count == len(provider._get_windows(tf, start, now)) - 1
+    assert not truncated